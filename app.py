@@ -12,6 +12,7 @@ from datetime import datetime
 
 # --- Import from the new shared data file ---
 import shared_data
+from src.modeling.predictor import warm_model_cache
 
 # Initialize the Dash App
 app = dash.Dash(
@@ -24,6 +25,9 @@ app = dash.Dash(
 server = app.server
 app.title = "BreatheEasy"
 
+# Load every city's forecast model up front so no user request pays for it.
+warm_model_cache()
+
 # Main App Layout
 app.layout = html.Div([
     dash.page_container,
@@ -9,6 +9,9 @@ to classify a numerical AQI value into its corresponding category.
 """
 
 import logging 
+from typing import NamedTuple
+
+import numpy as np
 import pandas as pd
 
 
@@ -22,14 +25,57 @@ It helps you understand the potential health effects associated with different l
 """
 
 # --- AQI Scale and Health Implications (India CPCB NAQI Standard) ---
-AQI_SCALE = [
+AQI_SCALE = (
     {"range": "0-50", "level": "Good", "color": "#228B22", "implications": "Minimal Impact. Air quality is considered satisfactory, and air pollution poses little or no risk."},
     {"range": "51-100", "level": "Satisfactory", "color": "#90EE90", "implications": "Minor breathing discomfort to sensitive people. Air quality is acceptable."},
     {"range": "101-200", "level": "Moderate", "color": "#FFD700", "implications": "Breathing discomfort to people with lung disease such as asthma, and discomfort to people with heart disease, children and older adults."},
     {"range": "201-300", "level": "Poor", "color": "#FFA500", "implications": "Breathing discomfort to people on prolonged exposure, and discomfort to people with heart disease."},
     {"range": "301-400", "level": "Very Poor", "color": "#FF0000", "implications": "Respiratory illness on prolonged exposure. Effect may be more pronounced in people with lung and heart diseases."},
-    {"range": "401-500", "level": "Severe", "color": "#800000", "implications": "Affects healthy people and seriously impacts those with existing diseases. May cause respiratory impact even on light physical activity."}
-]
+    {"range": "401-500", "level": "Severe", "color": "#800000", "implications": "Affects healthy people and seriously impacts those with existing diseases. May cause respiratory impact even on light physical activity."},
+)
+
+
+class AQIBand(NamedTuple):
+    """Numeric bounds of one AQI_SCALE category, parsed once at import."""
+    low: int
+    high: int
+    category: dict
+
+
+def _parse_aqi_scale(scale):
+    """Converts the 'low-high' range strings of an AQI scale into AQIBand tuples."""
+    bands = []
+    for category in scale:
+        try:
+            if '-' in category['range']:
+                low, high = map(int, category['range'].split('-'))
+                bands.append(AQIBand(low, high, category))
+        except ValueError:
+            log.error(f"Could not parse AQI range string: {category['range']}")
+    return tuple(bands)
+
+
+_AQI_BANDS = _parse_aqi_scale(AQI_SCALE)
+
+
+def _build_aqi_lookup(bands, scale):
+    """
+    Expands the parsed bands into a table indexed by integer AQI (0 to the top of the scale).
+
+    Each slot holds the category the band scan would have returned for that integer,
+    so a lookup is a single index instead of a loop over the bands.
+    """
+    top = max((band.high for band in bands), default=-1)
+    lookup = []
+    for aqi in range(top + 1):
+        category = next((band.category for band in bands if band.low <= aqi <= band.high), None)
+        lookup.append(category if category is not None else scale[-1])
+    return tuple(lookup)
+
+
+_AQI_LOOKUP = _build_aqi_lookup(_AQI_BANDS, AQI_SCALE)
+# Upper bounds of the (contiguous) bands, for classifying whole arrays with searchsorted.
+_AQI_BAND_HIGHS = np.array([band.high for band in _AQI_BANDS], dtype=np.float64)
 
 
 def get_aqi_info(aqi_value):
@@ -47,16 +93,9 @@ def get_aqi_info(aqi_value):
 
     aqi_value = int(aqi_value + 0.5)
     
-    # 2. Find the matching category in the defined scale.
-    for category in AQI_SCALE:
-        try:
-            if '-' in category['range']:
-                low, high = map(int, category['range'].split('-'))
-                if low <= aqi_value <= high:
-                    return category
-        except ValueError:
-            log.error(f"Could not parse AQI range string: {category['range']}")
-            continue
+    # 2. Look up the category for this integer AQI in the precomputed table.
+    if aqi_value < len(_AQI_LOOKUP):
+        return _AQI_LOOKUP[aqi_value]
 
     # 3. Handle cases where the AQI value is above the highest defined range.
     if AQI_SCALE:
@@ -66,6 +105,31 @@ def get_aqi_info(aqi_value):
     return None
 
 
+def get_aqi_info_batch(aqi_values):
+    """
+    Classifies a sequence of numerical AQI values in one vectorized pass.
+
+    Equivalent to calling `get_aqi_info` on each value, but rounds and finds every
+    band with a single `np.searchsorted`, without per-value validation logging.
+
+    Args:
+        aqi_values (array-like): Numerical AQI values.
+
+    Returns:
+        list[dict | None]: The AQI_SCALE category for each value, or None where the
+                           value is NaN or negative.
+    """
+    values = np.asarray(aqi_values, dtype=np.float64)
+    # floor(v + 0.5) matches get_aqi_info's int(v + 0.5) for the non-negative values kept.
+    band_idx = np.searchsorted(_AQI_BAND_HIGHS, np.floor(values + 0.5), side='left')
+    valid = values >= 0  # False for NaN as well
+    top = len(_AQI_BANDS)
+    return [
+        (_AQI_BANDS[idx].category if idx < top else AQI_SCALE[-1]) if ok else None
+        for idx, ok in zip(band_idx.tolist(), valid.tolist())
+    ]
+
+
 # --- Example Usage / Direct Execution ---
 if __name__ == "__main__":
 
@@ -89,12 +153,13 @@ if __name__ == "__main__":
         550, 1000            # Above range (should be Severe)
     ]
 
-    for aqi in valid_test_values:
-        info = get_aqi_info(aqi)
-        if info:
-            print(f"AQI: {aqi:<4} -> Level: {info['level']:<12} | Color: {info['color']:<8} | Implications: {info['implications']}")
-        else:
-            print(f"AQI: {aqi:<4} -> FAILED to get info, returned None unexpectedly.")
+    lines = [
+        f"AQI: {aqi:<4} -> Level: {info['level']:<12} | Color: {info['color']:<8} | Implications: {info['implications']}"
+        if (info := get_aqi_info(aqi)) else
+        f"AQI: {aqi:<4} -> FAILED to get info, returned None unexpectedly."
+        for aqi in valid_test_values
+    ]
+    print("\n".join(lines))
 
     print("\n" + "-"*40)
     print("--- Testing get_aqi_info with invalid values ---")
@@ -105,12 +170,13 @@ if __name__ == "__main__":
         "not a number"
     ]
 
-    for aqi in invalid_test_values:
-        info = get_aqi_info(aqi)
-        if info is None:
-            print(f"Input: {str(aqi):<15} -> Correctly returned None as expected.")
-        else:
-            print(f"Input: {str(aqi):<15} -> FAILED, expected None but got a result: {info}")
+    lines = [
+        f"Input: {str(aqi):<15} -> Correctly returned None as expected."
+        if (info := get_aqi_info(aqi)) is None else
+        f"Input: {str(aqi):<15} -> FAILED, expected None but got a result: {info}"
+        for aqi in invalid_test_values
+    ]
+    print("\n".join(lines))
 
     print("\n" + "="*40)
     print(" info.py Self-Test Finished ")
@@ -11,49 +11,159 @@ risk advisories.
 """
 
 import logging 
+import math
+from bisect import bisect_right
+from functools import lru_cache
+from typing import NamedTuple
+
+import numpy as np
 
 log = logging.getLogger(__name__)
 
+# --- Risk Descriptions ---
+# Shared by every pollutant at the same severity, so each sentence is defined once.
+_RISK_SEVERE = "Serious respiratory impact on healthy people. Serious aggravation of heart or lung disease."
+_RISK_SEVERE_CO = "Serious aggravation of heart or lung disease; may cause respiratory effects even during light activity."
+_RISK_VERY_POOR = "Respiratory illness on prolonged exposure. Effect may be pronounced in people with heart/lung diseases."
+_RISK_POOR = "Breathing discomfort to people on prolonged exposure, and discomfort to people with heart disease."
+_RISK_MODERATE = "Breathing discomfort to people with lung disease (e.g., asthma) and heart disease, children, older adults."
+
 # --- Pollutant Health Risk Thresholds ---
 POLLUTANT_HEALTH_THRESHOLDS = {
     "pm25": [ # PM2.5 (µg/m³)
-        {"threshold": 251, "risk": "Serious respiratory impact on healthy people. Serious aggravation of heart or lung disease.", "severity": "Severe"},
-        {"threshold": 121, "risk": "Respiratory illness on prolonged exposure. Effect may be pronounced in people with heart/lung diseases.", "severity": "Very Poor"},
-        {"threshold": 91,  "risk": "Breathing discomfort to people on prolonged exposure, and discomfort to people with heart disease.", "severity": "Poor"},
-        {"threshold": 61,  "risk": "Breathing discomfort to people with lung disease (e.g., asthma) and heart disease, children, older adults.", "severity": "Moderate"},
+        {"threshold": 251, "risk": _RISK_SEVERE, "severity": "Severe"},
+        {"threshold": 121, "risk": _RISK_VERY_POOR, "severity": "Very Poor"},
+        {"threshold": 91,  "risk": _RISK_POOR, "severity": "Poor"},
+        {"threshold": 61,  "risk": _RISK_MODERATE, "severity": "Moderate"},
     ],
     "pm10": [ # PM10 (µg/m³)
-        {"threshold": 431, "risk": "Serious respiratory impact on healthy people. Serious aggravation of heart or lung disease.", "severity": "Severe"},
-        {"threshold": 351, "risk": "Respiratory illness on prolonged exposure. Effect may be pronounced in people with heart/lung diseases.", "severity": "Very Poor"},
-        {"threshold": 251, "risk": "Breathing discomfort to people on prolonged exposure, and discomfort to people with heart disease.", "severity": "Poor"},
-        {"threshold": 101, "risk": "Breathing discomfort to people with lung disease (e.g., asthma) and heart disease, children, older adults.", "severity": "Moderate"},
+        {"threshold": 431, "risk": _RISK_SEVERE, "severity": "Severe"},
+        {"threshold": 351, "risk": _RISK_VERY_POOR, "severity": "Very Poor"},
+        {"threshold": 251, "risk": _RISK_POOR, "severity": "Poor"},
+        {"threshold": 101, "risk": _RISK_MODERATE, "severity": "Moderate"},
     ],
     "o3": [ # Ozone (µg/m³)
-        {"threshold": 749, "risk": "Serious respiratory impact on healthy people. Serious aggravation of heart or lung disease.", "severity": "Severe"},
-        {"threshold": 209, "risk": "Respiratory illness on prolonged exposure. Effect may be pronounced in people with heart/lung diseases.", "severity": "Very Poor"},
-        {"threshold": 169, "risk": "Breathing discomfort to people on prolonged exposure, and discomfort to people with heart disease.", "severity": "Poor"},
-        {"threshold": 101, "risk": "Breathing discomfort to people with lung disease (e.g., asthma) and heart disease, children, older adults.", "severity": "Moderate"},
+        {"threshold": 749, "risk": _RISK_SEVERE, "severity": "Severe"},
+        {"threshold": 209, "risk": _RISK_VERY_POOR, "severity": "Very Poor"},
+        {"threshold": 169, "risk": _RISK_POOR, "severity": "Poor"},
+        {"threshold": 101, "risk": _RISK_MODERATE, "severity": "Moderate"},
     ],
     "no2": [ # Nitrogen Dioxide (µg/m³)
-        {"threshold": 401, "risk": "Serious respiratory impact on healthy people. Serious aggravation of heart or lung disease.", "severity": "Severe"},
-        {"threshold": 281, "risk": "Respiratory illness on prolonged exposure. Effect may be pronounced in people with heart/lung diseases.", "severity": "Very Poor"},
-        {"threshold": 181, "risk": "Breathing discomfort to people on prolonged exposure, and discomfort to people with heart disease.", "severity": "Poor"},
-        {"threshold": 81,  "risk": "Breathing discomfort to people with lung disease (e.g., asthma) and heart disease, children, older adults.", "severity": "Moderate"},
+        {"threshold": 401, "risk": _RISK_SEVERE, "severity": "Severe"},
+        {"threshold": 281, "risk": _RISK_VERY_POOR, "severity": "Very Poor"},
+        {"threshold": 181, "risk": _RISK_POOR, "severity": "Poor"},
+        {"threshold": 81,  "risk": _RISK_MODERATE, "severity": "Moderate"},
     ],
     "so2": [ # Sulfur Dioxide (µg/m³)
-        {"threshold": 1601, "risk": "Serious respiratory impact on healthy people. Serious aggravation of heart or lung disease.", "severity": "Severe"},
-        {"threshold": 801, "risk": "Respiratory illness on prolonged exposure. Effect may be pronounced in people with heart/lung diseases.", "severity": "Very Poor"},
-        {"threshold": 381, "risk": "Breathing discomfort to people on prolonged exposure, and discomfort to people with heart disease.", "severity": "Poor"},
-        {"threshold": 81,  "risk": "Breathing discomfort to people with lung disease (e.g., asthma) and heart disease, children, older adults.", "severity": "Moderate"},
+        {"threshold": 1601, "risk": _RISK_SEVERE, "severity": "Severe"},
+        {"threshold": 801, "risk": _RISK_VERY_POOR, "severity": "Very Poor"},
+        {"threshold": 381, "risk": _RISK_POOR, "severity": "Poor"},
+        {"threshold": 81,  "risk": _RISK_MODERATE, "severity": "Moderate"},
     ],
     "co": [ # Carbon Monoxide (mg/m³)
-        {"threshold": 34.1, "risk": "Serious aggravation of heart or lung disease; may cause respiratory effects even during light activity.", "severity": "Severe"},
-        {"threshold": 17.1, "risk": "Respiratory illness on prolonged exposure. Effect may be pronounced in people with heart/lung diseases.", "severity": "Very Poor"},
-        {"threshold": 10.1, "risk": "Breathing discomfort to people on prolonged exposure, and discomfort to people with heart disease.", "severity": "Poor"},
-        {"threshold": 2.1,  "risk": "Breathing discomfort to people with lung disease (e.g., asthma) and heart disease, children, older adults.", "severity": "Moderate"},
+        {"threshold": 34.1, "risk": _RISK_SEVERE_CO, "severity": "Severe"},
+        {"threshold": 17.1, "risk": _RISK_VERY_POOR, "severity": "Very Poor"},
+        {"threshold": 10.1, "risk": _RISK_POOR, "severity": "Poor"},
+        {"threshold": 2.1,  "risk": _RISK_MODERATE, "severity": "Moderate"},
     ]
 }
 
+
+class ThresholdLevel(NamedTuple):
+    """An immutable, attribute-accessible view of one POLLUTANT_HEALTH_THRESHOLDS entry."""
+    threshold: float
+    severity: str
+    risk: str
+    message: str
+
+
+# Levels per pollutant, sorted once here (lowest threshold first) so a value can be
+# placed with bisect_right against the parallel tuple of bare threshold numbers.
+_ASC_LEVELS = {
+    pollutant: tuple(sorted(
+        (ThresholdLevel(level["threshold"], level["severity"], level["risk"],
+                        f"{pollutant.upper()} ({level['severity']}): {level['risk']}")
+         for level in levels),
+        key=lambda level: level.threshold,
+    ))
+    for pollutant, levels in POLLUTANT_HEALTH_THRESHOLDS.items()
+}
+_ASC_THRESHOLDS = {
+    pollutant: tuple(level.threshold for level in levels)
+    for pollutant, levels in _ASC_LEVELS.items()
+}
+# Ordinal severity codes (0 means no threshold met), as returned by interpret_max_severity.
+SEVERITY_CODES = {"Moderate": 1, "Poor": 2, "Very Poor": 3, "Severe": 4}
+_ASC_SEVERITY_CODES = {
+    pollutant: tuple(SEVERITY_CODES[level.severity] for level in levels)
+    for pollutant, levels in _ASC_LEVELS.items()
+}
+# Lowest threshold per pollutant; anything below it cannot trigger an advisory.
+_MIN_THRESHOLDS = {pollutant: thresholds[0] for pollutant, thresholds in _ASC_THRESHOLDS.items()}
+
+# Array form of the same tables for the batch path: one row of ascending thresholds
+# per pollutant, right-padded with NaN (which no value, not even +inf, compares >=)
+# so every row has the same width. _MESSAGE_MATRIX is the parallel table of
+# advisories with a None column 0, so [pollutant, level] from _classify_levels
+# indexes it directly.
+_POLLUTANTS = tuple(POLLUTANT_HEALTH_THRESHOLDS)
+# AQICN 'iaqi' payloads also carry weather keys ('h', 'p', 't', 'w', 'wd', 'wg', ...);
+# intersecting with this set drops them in C, leaving at most len(_POLLUTANTS) keys.
+_POLLUTANT_KEYS = frozenset(_POLLUTANTS)
+_POLLUTANT_RANK = {pollutant: rank for rank, pollutant in enumerate(_POLLUTANTS)}
+_MAX_LEVELS = max(len(thresholds) for thresholds in _ASC_THRESHOLDS.values())
+_THRESHOLD_MATRIX = np.array(
+    [_ASC_THRESHOLDS[pollutant] + (np.nan,) * (_MAX_LEVELS - len(_ASC_THRESHOLDS[pollutant]))
+     for pollutant in _POLLUTANTS],
+    dtype=np.float64,
+)
+_MESSAGE_MATRIX = np.array(
+    [(None,) + tuple(level.message for level in _ASC_LEVELS[pollutant])
+     + (None,) * (_MAX_LEVELS - len(_ASC_LEVELS[pollutant]))
+     for pollutant in _POLLUTANTS],
+    dtype=object,
+)
+
+
+def _classify_levels(values):
+    """
+    Maps an (N, len(_POLLUTANTS)) float array of pollutant values to risk level indices.
+
+    Returns an int8 array of the same shape where 0 means no threshold was reached
+    and k means the k-th lowest threshold of that pollutant was the highest one met.
+    The level is simply the count of thresholds each value is >= to, computed with
+    one broadcast comparison and a sum, with no branching. NaN compares False
+    against everything, so a NaN value always maps to 0, and the NaN padding in
+    _THRESHOLD_MATRIX is never counted, even for an infinite value.
+    """
+    return (values[:, :, np.newaxis] >= _THRESHOLD_MATRIX).sum(axis=2, dtype=np.int8)
+
+
+def _parse_pollutant_value(pollutant, raw_value):
+    """Converts a raw iaqi 'v' value to a float, or returns None if it is unusable."""
+    # AQICN reports plain ints/floats almost always, so test for those first; only
+    # text (str, its subclasses such as np.str_, and bytes) needs a try/except, and
+    # anything else non-numeric is rejected outright.
+    value_type = type(raw_value)
+    if value_type is int or value_type is float:
+        value = raw_value
+    elif value_type is str or isinstance(raw_value, (str, bytes, bytearray)):
+        try:
+            value = float(raw_value)
+        except ValueError as e:
+            log.warning("Could not parse value for pollutant '%s': %s. Error: %s", pollutant, raw_value, e)
+            return None
+    elif isinstance(raw_value, (int, float, np.number)):
+        value = float(raw_value)
+    else:
+        log.warning("Unsupported value type for pollutant '%s': %s.", pollutant, value_type.__name__)
+        return None
+    if math.isnan(value):
+        log.warning("NaN value received for pollutant '%s'. Skipping.", pollutant)
+        return None
+    return value
+
+
 def interpret_pollutant_risks(iaqi_data):
     """
     Analyzes individual pollutant levels to identify the highest potential health risk for each.
@@ -78,65 +188,188 @@ def interpret_pollutant_risks(iaqi_data):
         log.warning("Invalid or empty iaqi_data received for interpretation.")
         return triggered_risks
     
-    log.info(f"Interpreting risks using CPCB-derived thresholds for iaqi data: {iaqi_data}")
-
-    for pollutant, thresholds in POLLUTANT_HEALTH_THRESHOLDS.items():
-        if pollutant in iaqi_data and isinstance(iaqi_data[pollutant], dict) and 'v' in iaqi_data[pollutant]:
-            try:
-                value = float(iaqi_data[pollutant]['v'])
-                log.debug(f"Checking {pollutant.upper()} with value {value}")
-
-                highest_risk_found = None
-                for level_info in sorted(thresholds, key=lambda x: x['threshold'], reverse=True): 
-                    if value >= level_info["threshold"]:
-                        highest_risk_found = f"{pollutant.upper()} ({level_info['severity']}): {level_info['risk']}"
-                        log.info(f"Threshold exceeded for {pollutant.upper()} at value {value} (>= {level_info['threshold']}). Risk: {level_info['risk']}")
-                        break
-                if highest_risk_found:
-                    triggered_risks.append(highest_risk_found)
-            except (ValueError, TypeError) as e:
-                log.warning(f"Could not parse value for pollutant '{pollutant}': {iaqi_data[pollutant].get('v')}. Error: {e}")
-                continue
-        else:
-            log.debug(f"Pollutant '{pollutant}' not found or format invalid: {iaqi_data.get(pollutant)}")
+    log.info("Interpreting risks using CPCB-derived thresholds for iaqi data: %s", iaqi_data)
+    present = _POLLUTANT_KEYS.intersection(iaqi_data)
+    if not present:
+        log.info("iaqi data contains none of the tracked pollutants; nothing to interpret.")
+        return triggered_risks
+
+    readings = _collect_readings(iaqi_data, present)
+    if readings:
+        triggered_risks = list(_interpret_readings(readings))
     if not triggered_risks:
         log.info("No significant pollutant thresholds exceeded based on CPCB-derived rules.")
     return triggered_risks
 
-# --- Example Usage / Direct Execution ---
-if __name__ == "__main__":
-
-    logging.basicConfig(level=logging.INFO, format='%(name)s - %(levelname)s - %(message)s')
-
-    print("\n" + "="*40)
-    print(" Running interpreter.py Self-Test ")
-    print("="*40 + "\n")
-
-    # --- Test Cases ---
-    test_cases = {
-        "Clean Air": {'pm25': {'v': 20}, 'o3': {'v': 30}},
-        "Moderate PM2.5": {'pm25': {'v': 75.5}, 'co': {'v': 1.0}},
-        "Poor PM10 & Moderate O3": {'pm10': {'v': 255}, 'o3': {'v': 110}},
-        "Very Poor Multiple": {'pm25': {'v': 130}, 'no2': {'v': 300}},
-        "Severe SO2": {'so2': {'v': 1700}},
-        "Missing Pollutant Value": {'pm25': {'w': 100}},
-        "Invalid Pollutant Value": {'co': {'v': 'high'}},
-        "Empty Input": {},
-        "None Input": None,
-    }
-
-    for name, data in test_cases.items():
-        print(f"--- Testing Case: {name} ---")
-        print(f"Input Data: {data}")
-        risks = interpret_pollutant_risks(data)
-        if risks:
-            print("  --> Identified Risks:")
-            for risk in risks:
-                print(f"    - {risk}")
-        else:
-            print("  --> No significant risks identified.")
-        print("-" * 20)
-
-    print("\n" + "="*40)
-    print(" interpreter.py Self-Test Finished ")
-    print("="*40 + "\n")
\ No newline at end of file
+
+def interpret_max_severity(iaqi_data):
+    """
+    Returns the highest severity reached by any pollutant, as an ordinal code.
+
+    For alerting/routing code that only needs "how bad is it", this skips building
+    the advisory strings that `interpret_pollutant_risks` returns.
+
+    Args:
+        iaqi_data (dict | None): Same format as for `interpret_pollutant_risks`.
+
+    Returns:
+        int: 0 if no threshold is met (or input is invalid), otherwise the
+             SEVERITY_CODES value of the worst band reached (1=Moderate ... 4=Severe).
+    """
+    if not iaqi_data or not isinstance(iaqi_data, dict):
+        log.warning("Invalid or empty iaqi_data received for severity lookup.")
+        return 0
+    present = _POLLUTANT_KEYS.intersection(iaqi_data)
+    if not present:
+        return 0
+    # Readings are already at or above their lowest threshold, so bisect never gives -1.
+    return max(
+        (_ASC_SEVERITY_CODES[pollutant][bisect_right(_ASC_THRESHOLDS[pollutant], value) - 1]
+         for pollutant, value in _collect_readings(iaqi_data, present)),
+        default=0,
+    )
+
+
+def _collect_readings(iaqi_data, present):
+    """
+    Parses the tracked pollutants in `present` into a tuple of (pollutant, value) readings.
+
+    Readings come out in table order, and only those at or above the pollutant's
+    lowest threshold are kept; malformed or unparseable entries are skipped.
+    """
+    readings = []
+    # Local aliases for the names used on every loop iteration (LOAD_FAST, not LOAD_GLOBAL).
+    append_reading = readings.append
+    parse_value = _parse_pollutant_value
+    min_thresholds = _MIN_THRESHOLDS
+    debug_enabled = log.isEnabledFor(logging.DEBUG)
+
+    # Sorting by table rank keeps advisories in a fixed order regardless of set order.
+    for pollutant in sorted(present, key=_POLLUTANT_RANK.__getitem__):
+        entry = iaqi_data.get(pollutant)
+        if type(entry) is not dict or 'v' not in entry:
+            if debug_enabled:
+                log.debug("Pollutant '%s' has an invalid format: %s", pollutant, entry)
+            continue
+        value = parse_value(pollutant, entry['v'])
+        # Clean-air readings are dropped here rather than classified, which also keeps
+        # them out of the cache key so all-clean payloads never reach the cache at all.
+        if value is not None and value >= min_thresholds[pollutant]:
+            append_reading((pollutant, value))
+    return tuple(readings)
+
+
+@lru_cache(maxsize=512)
+def _interpret_readings(readings):
+    """
+    Classifies a tuple of (pollutant, value) readings into a tuple of advisories.
+
+    This is the pure core of `interpret_pollutant_risks`. It is memoized because
+    dashboards poll the same station far more often than its readings change
+    (AQICN updates roughly hourly).
+    """
+    risks = []
+    debug_enabled = log.isEnabledFor(logging.DEBUG)
+    info_enabled = log.isEnabledFor(logging.INFO)
+    for pollutant, value in readings:
+        if debug_enabled:
+            log.debug("Checking %s with value %s", pollutant.upper(), value)
+        # Index of the highest threshold that value is >= to; -1 means none exceeded.
+        idx = bisect_right(_ASC_THRESHOLDS[pollutant], value) - 1
+        if idx >= 0:
+            hit = _ASC_LEVELS[pollutant][idx]
+            if info_enabled:
+                log.info("Threshold exceeded for %s at value %s (>= %s). Risk: %s",
+                         pollutant.upper(), value, hit.threshold, hit.risk)
+            risks.append(hit.message)
+    return tuple(risks)
+
+
+def interpret_pollutant_risks_batch(iaqi_list):
+    """
+    Interprets pollutant risks for many AQICN 'iaqi' payloads at once.
+
+    Stacks every payload's pollutant values into an (N, pollutants) array,
+    classifies the whole array in one `_classify_levels` call, and only then turns
+    level indices into messages, instead of running the scalar interpreter N times.
+
+    Args:
+        iaqi_list (list[dict | None]): A list of 'iaqi' dictionaries, one per station
+                                       or timestamp. Invalid entries yield no risks.
+
+    Returns:
+        list[list[str]]: One list of risk advisories per input payload, in the same
+                         order and format as `interpret_pollutant_risks`.
+    """
+    if not iaqi_list:
+        return []
+
+    def _value_or_nan(iaqi_data, pollutant):
+        entry = iaqi_data.get(pollutant) if isinstance(iaqi_data, dict) else None
+        if type(entry) is dict and 'v' in entry:
+            value = _parse_pollutant_value(pollutant, entry['v'])
+            if value is not None:
+                return value
+        return np.nan
+
+    values = np.array(
+        [[_value_or_nan(iaqi_data, pollutant) for pollutant in _POLLUTANTS] for iaqi_data in iaqi_list],
+        dtype=np.float64,
+    )
+    log.info("Interpreting risks for a batch of %d iaqi payloads.", len(iaqi_list))
+
+    return _levels_to_risk_lists(_classify_levels(values))
+
+
+def interpret_pollutant_risks_df(df):
+    """
+    Interprets pollutant risks for every row of a DataFrame in one vectorized pass.
+
+    Each tracked pollutant is read from the column of the same name (e.g. 'pm25',
+    'co'); missing columns, NaN cells and non-numeric cells are treated as "not
+    reported".
+
+    Args:
+        df (pd.DataFrame): One row per station/timestamp, one column per pollutant.
+
+    Returns:
+        pd.Series: Indexed like `df`; each value is the list of risk advisories for
+                   that row, in the same format as `interpret_pollutant_risks`.
+    """
+    import pandas as pd  # Deferred: callers of this function already have pandas loaded.
+
+    values = np.full((len(df), len(_POLLUTANTS)), np.nan, dtype=np.float64)
+    for col, pollutant in enumerate(_POLLUTANTS):
+        if pollutant in df.columns:
+            # Unparseable cells become NaN ("not reported") in one vectorized pass.
+            values[:, col] = pd.to_numeric(df[pollutant], errors='coerce').to_numpy(dtype=np.float64, na_value=np.nan)
+    return pd.Series(_levels_to_risk_lists(_classify_levels(values)), index=df.index, dtype=object)
+
+
+def _levels_to_risk_lists(level_idx):
+    """Turns an (N, pollutants) level-index array into N lists of advisories."""
+    rows, cols = np.nonzero(level_idx)
+    messages = _MESSAGE_MATRIX[cols, level_idx[rows, cols]]
+    risk_lists = [[] for _ in range(level_idx.shape[0])]
+    for row, message in zip(rows.tolist(), messages.tolist()):
+        risk_lists[row].append(message)
+    return risk_lists
+
+
+async def interpret_pollutant_risks_batch_async(iaqi_list):
+    """
+    Async counterpart of `interpret_pollutant_risks_batch` for use from event loops.
+
+    Runs the whole batch in a single worker-thread dispatch via asyncio.to_thread,
+    so an async handler refreshing many stations neither blocks its event loop nor
+    pays one thread hand-off per station.
+
+    Args:
+        iaqi_list (list[dict | None]): A list of 'iaqi' dictionaries.
+
+    Returns:
+        list[list[str]]: One list of risk advisories per input payload.
+    """
+    import asyncio  # Deferred: only async callers should pay for importing asyncio.
+
+    return await asyncio.to_thread(interpret_pollutant_risks_batch, iaqi_list)
@@ -4,12 +4,17 @@ Handles loading saved DAILY LightGBM models and generating a 3-day AQI forecast.
 """
 
 import pandas as pd
+import numpy as np
 import os
 import sys
 import logging
-import joblib
+import threading
+import time
 import requests
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from datetime import timedelta
+from functools import lru_cache
 import math
 
 # --- Setup Project Root Path ---
@@ -20,7 +25,7 @@ if PROJECT_ROOT not in sys.path:
 # --- Import Project Modules & Dependencies ---
 try:
     from src.config_loader import CONFIG
-    from src.health_rules.info import get_aqi_info
+    from src.health_rules.info import get_aqi_info_batch
     from src.exceptions import ModelFileNotFoundError, PredictionError
     from src.api_integration.client import get_current_aqi_for_city
 except ImportError as e:
@@ -28,7 +33,8 @@ except ImportError as e:
     logging.error(f"Predictor: Could not import dependencies. Using dummy fallbacks. Error: {e}")
     class ModelFileNotFoundError(FileNotFoundError): pass
     class PredictionError(Exception): pass
-    def get_aqi_info(aqi_value): return {'level': 'N/A', 'color': '#DDDDDD', 'implications': 'AQI info unavailable.'}
+    def get_aqi_info_batch(aqi_values):
+        return [{'level': 'N/A', 'color': '#DDDDDD', 'implications': 'AQI info unavailable.'} for _ in aqi_values]
     def get_current_aqi_for_city(city_name):
         logging.error("Dummy get_current_aqi_for_city called due to import error.")
         # Return a dictionary with an 'error' key to signal failure
@@ -40,92 +46,262 @@ log = logging.getLogger(__name__)
 MODELS_DIR = os.path.join(PROJECT_ROOT, "models")
 DATA_PATH = os.path.join(PROJECT_ROOT, "data", "Post-Processing", "CSV_Files", "Master_Daily_Features.csv")
 WEATHER_FORECAST_API_URL = "https://api.open-meteo.com/v1/forecast"
+# Daily Open-Meteo variables used as model features, in the order they are read.
+WEATHER_FEATURES = [
+    'temperature_2m_mean', 'temperature_2m_min', 'temperature_2m_max',
+    'relative_humidity_2m_mean', 'precipitation_sum', 'wind_speed_10m_mean',
+]
+# Only the lag source (AQI) and the station location are read from the history file;
+# the weather and calendar features for forecast days come from the forecast API.
+HISTORY_COLUMNS = ['Date', 'City', 'AQI', 'latitude', 'longitude']
 MAX_RESIDUAL_CAP = CONFIG.get('modeling', {}).get('max_residual_cap', 75)
-_loaded_models_cache = {}
+MODEL_CACHE_SIZE = CONFIG.get('modeling', {}).get('model_cache_size', 32)
+# Forecasts within these windows reuse the same live AQI anchor and weather forecast;
+# values below 1 second are treated as 1 second.
+LIVE_AQI_TTL_SECONDS = CONFIG.get('modeling', {}).get('live_aqi_ttl_seconds', 300)
+WEATHER_FORECAST_TTL_SECONDS = CONFIG.get('modeling', {}).get('weather_forecast_ttl_seconds', 3600)
+FORECAST_CACHE_SIZE = CONFIG.get('modeling', {}).get('forecast_cache_size', 256)
+
+# Background pool for network fetches that can overlap with forecast computation.
+_FETCH_EXECUTOR = ThreadPoolExecutor(max_workers=4, thread_name_prefix="forecast-fetch")
+
+_predictions_log_lock = threading.Lock()
+
+# Finished forecasts by (city, days_ahead, day, history mtime, live AQI and weather
+# TTL windows). Only successful forecasts are stored, and each is logged to
+# predictions_log.csv once, when first computed. Kept in least-recently-used order;
+# the least recently used entry is evicted beyond FORECAST_CACHE_SIZE.
+_forecast_cache = OrderedDict()
+_forecast_cache_lock = threading.Lock()
+
+# One lock per city so concurrent first requests for a city load its model once,
+# while loads for different cities still run in parallel.
+_model_load_locks = {}
+_model_load_locks_guard = threading.Lock()
+
 
 def load_lgbm_model(city_name: str):
-    """Loads a trained daily LightGBM model for a specific city."""
-    global _loaded_models_cache
-    if city_name in _loaded_models_cache:
-        log.info(f"Returning cached LightGBM model for {city_name}.")
-        return _loaded_models_cache[city_name]
+    """
+    Loads a trained daily LightGBM model for a specific city.
+
+    Up to MODEL_CACHE_SIZE loaded models are kept, least recently used first out
+    (failed loads are not cached); call `clear_model_cache()` after retraining to
+    pick up new files.
+    """
+    with _model_load_locks_guard:
+        city_lock = _model_load_locks.setdefault(city_name, threading.Lock())
+    with city_lock:
+        return _load_lgbm_model_cached(city_name)
 
+
+def clear_model_cache():
+    """
+    Forgets every loaded model so the next load reads the files again, along with
+    the finished forecasts computed from the old models.
+    """
+    _load_lgbm_model_cached.cache_clear()
+    with _forecast_cache_lock:
+        _forecast_cache.clear()
+
+
+@lru_cache(maxsize=MODEL_CACHE_SIZE)
+def _load_lgbm_model_cached(city_name: str):
+    """Deserializes a city's model file; memoized, and only called under its city lock."""
     model_filename = f"{city_name}_lgbm_daily_model.pkl"
     model_path = os.path.join(MODELS_DIR, model_filename)
     
-    if not os.path.exists(model_path):
-        raise ModelFileNotFoundError(f"Model file not found: {model_path}")
-        
-    model = joblib.load(model_path)
-    _loaded_models_cache[city_name] = model
-    log.info(f"Model for {city_name} loaded successfully.")
+    import joblib  # Deferred: only needed on a cache miss, and costs ~25 ms to import.
+    try:
+        model = joblib.load(model_path)
+    except FileNotFoundError as e:
+        raise ModelFileNotFoundError(f"Model file not found: {model_path}") from e
+    log.info("Model for %s loaded successfully.", city_name)
     return model
 
 
+def warm_model_cache(city_names=None, max_workers: int = 8):
+    """
+    Loads the models for several cities concurrently into the load_lgbm_model cache.
+
+    Intended for app startup so the first forecast request per city does not pay the
+    deserialization cost. Defaults to the configured `modeling.target_cities`.
+    Cities without a model file are logged and skipped.
+
+    Returns:
+        int: The number of models successfully loaded.
+    """
+    if city_names is None:
+        city_names = CONFIG.get('modeling', {}).get('target_cities', [])
+    city_names = list(city_names)
+    if not city_names:
+        return 0
+
+    def _try_load(city_name):
+        try:
+            load_lgbm_model(city_name)
+            return True
+        except Exception as e:
+            log.warning("Could not preload model for %s: %s", city_name, e)
+            return False
+
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(city_names))) as executor:
+        loaded = sum(executor.map(_try_load, city_names))
+    log.info("Preloaded %d/%d LightGBM models.", loaded, len(city_names))
+    return loaded
+
+
+@lru_cache(maxsize=1)
+def _load_recent_history(data_mtime: float):
+    """
+    Reads the history file once and returns each city's latest seven days, by city name.
+
+    Keyed on the file's modification time, so every forecast shares one parse until
+    the file is regenerated. The returned frames are shared and must not be modified.
+    """
+    full_df = pd.read_csv(DATA_PATH, usecols=HISTORY_COLUMNS, parse_dates=['Date'])
+    return {city: rows for city, rows in full_df.groupby('City', sort=False).tail(7).groupby('City', sort=False)}
+
+
+@lru_cache(maxsize=64)
+def _get_weather_forecast(latitude: float, longitude: float, ttl_bucket: int):
+    """
+    Fetches the 7-day daily weather forecast for a location, memoized per `ttl_bucket`.
+
+    Open-Meteo refreshes its daily forecast only a few times a day, so callers pass
+    the time divided into WEATHER_FORECAST_TTL_SECONDS windows and reuse the parsed
+    frame until the window rolls over. The returned frame is shared and must not be
+    modified. Failures raise and are therefore never cached.
+    """
+    params = {
+        "latitude": latitude, "longitude": longitude,
+        "daily": "temperature_2m_max,temperature_2m_min,temperature_2m_mean,relative_humidity_2m_mean,precipitation_sum,wind_speed_10m_mean",
+        "forecast_days": 7 
+    }
+    response = requests.get(WEATHER_FORECAST_API_URL, params=params)
+    response.raise_for_status()
+    weather_df = pd.DataFrame(response.json()['daily'])
+    weather_df.rename(columns={'time': 'Date'}, inplace=True)
+    weather_df['Date'] = pd.to_datetime(weather_df['Date'])
+    return weather_df
+
+
+@lru_cache(maxsize=64)
+def _get_live_aqi_value(city_name: str, ttl_bucket: int):
+    """
+    Fetches the live AQI anchor for a city, memoized per `ttl_bucket`.
+
+    Callers pass the current time divided into LIVE_AQI_TTL_SECONDS windows, so a
+    result is reused until the window rolls over. Failures raise and are therefore
+    never cached.
+    """
+    live_aqi_data = get_current_aqi_for_city(f"{city_name}, India")
+    if not (live_aqi_data and live_aqi_data.get('aqi') is not None):
+        raise PredictionError(f"Could not retrieve live AQI for {city_name}.")
+    return live_aqi_data['aqi']
+
+
+def format_forecast_for_ui(dates, calibrated_aqis):
+    """
+    Builds the dashboard's per-day forecast dicts from dates and calibrated AQI values.
+
+    Flooring, rounding, date formatting and category lookup are each done once over
+    the whole forecast; the loop only assembles the dicts.
+    """
+    aqis = np.fmax(1.0, np.asarray(calibrated_aqis, dtype=np.float64)) # Ensure not negative (NaN -> 1)
+    date_strings = pd.DatetimeIndex(dates).strftime('%Y-%m-%d')
+    rounded_aqis = np.rint(aqis).astype(np.int64).tolist()
+    aqi_infos = get_aqi_info_batch(aqis)
+    ui_list = []
+    for date_string, rounded_aqi, aqi_info in zip(date_strings, rounded_aqis, aqi_infos):
+        ui_list.append({
+            "date": date_string,
+            "predicted_aqi": rounded_aqi,
+            "level": aqi_info.get("level", "N/A"),
+            "color": aqi_info.get("color", "#FFFFFF"),
+            "implications": aqi_info.get("implications", "N/A")
+        })
+    return ui_list
+
+
 def get_daily_summary_forecast(city_name: str, days_ahead: int = 3):
     """
     High-level function to generate a daily AQI forecast for the next 3 days.
     """
-    log.info(f"--- Starting {days_ahead}-day forecast for {city_name} ---")
+    log.info("--- Starting %d-day forecast for %s ---", days_ahead, city_name)
+    live_aqi_future = None
     try:
-        # --- Step 1: Get the Anchor - The Live AQI Value ---
-        log.info(f"Fetching live AQI for {city_name} to anchor forecast...")
-        live_aqi_data = get_current_aqi_for_city(f"{city_name}, India")
-        if not (live_aqi_data and live_aqi_data.get('aqi') is not None):
-            raise PredictionError(f"Could not retrieve live AQI for {city_name}.")
-        live_aqi_value = live_aqi_data['aqi']
-        log.info(f"Successfully fetched live AQI anchor: {live_aqi_value}")
-        
+        # Every input is either fixed for the day or cached per TTL window, so the
+        # forecast itself is deterministic for this key and can be served from memory.
+        now = time.time()
+        today_date = pd.Timestamp.now().normalize()
+        history_mtime = os.path.getmtime(DATA_PATH)
+        live_aqi_bucket = int(now // max(1, LIVE_AQI_TTL_SECONDS))
+        weather_bucket = int(now // max(1, WEATHER_FORECAST_TTL_SECONDS))
+        forecast_key = (city_name, days_ahead, today_date, history_mtime, live_aqi_bucket, weather_bucket)
+        with _forecast_cache_lock:
+            cached_forecast = _forecast_cache.get(forecast_key)
+            if cached_forecast is not None:
+                _forecast_cache.move_to_end(forecast_key)
+        if cached_forecast is not None:
+            log.info("Returning cached %d-day forecast for %s.", days_ahead, city_name)
+            return [dict(day) for day in cached_forecast]
+
+        # --- Step 1: Start fetching the Anchor - The Live AQI Value ---
+        # The request runs in the background while the model, history and weather are
+        # prepared; its result is only needed once the raw forecast exists (Step 3).
+        log.info("Fetching live AQI for %s to anchor forecast...", city_name)
+        live_aqi_future = _FETCH_EXECUTOR.submit(_get_live_aqi_value, city_name, live_aqi_bucket)
+
         # --- Step 2: Generate a Raw Multi-Day Forecast ---
         # We will generate a forecast starting from today to get the model's expected trend.
         model = load_lgbm_model(city_name)
-        full_df = pd.read_csv(DATA_PATH, parse_dates=['Date'])
-        city_history = full_df[full_df['City'] == city_name].tail(7)
-        if len(city_history) < 7: raise PredictionError("Not enough history for lags.")
+        city_history = _load_recent_history(history_mtime).get(city_name)
+        if city_history is None or len(city_history) < 7: raise PredictionError("Not enough history for lags.")
         
         last_known_row = city_history.iloc[-1]
-        params = {
-            "latitude": last_known_row['latitude'], "longitude": last_known_row['longitude'],
-            "daily": "temperature_2m_max,temperature_2m_min,temperature_2m_mean,relative_humidity_2m_mean,precipitation_sum,wind_speed_10m_mean",
-            "forecast_days": 7 
-        }
-        response = requests.get(WEATHER_FORECAST_API_URL, params=params)
-        response.raise_for_status()
-        weather_df = pd.DataFrame(response.json()['daily'])
-        weather_df.rename(columns={'time': 'Date'}, inplace=True)
-        weather_df['Date']
+        weather_df = _get_weather_forecast(
+            float(last_known_row['latitude']), float(last_known_row['longitude']), weather_bucket
+        )
         
         # Iteratively generate a "raw" forecast for today and the next 3 days
         raw_predictions = []
-        current_history = city_history.reset_index(drop=True)
-        today_date = pd.Timestamp.now().normalize()
+        # Only the AQI series is needed for the lag features, so the rolling history is a
+        # plain list of values that predictions are appended to (lag_1 = [-1], lag_7 = [-7]).
+        aqi_history = city_history['AQI'].tolist()
+        # Open-Meteo returns one row per consecutive day, so each target day sits at a
+        # fixed offset from the first row; the date is still checked before use.
+        weather_dates = weather_df['Date'].to_numpy(dtype='datetime64[ns]')
+        weather_offset = (today_date - pd.Timestamp(weather_dates[0])).days if len(weather_dates) else 0
+        # One float matrix of the weather features, read by row below instead of slicing
+        # the frame and pulling each column out of the slice for every day.
+        weather_values = weather_df[WEATHER_FEATURES].to_numpy(dtype=np.float64)
+        # LGBMRegressor.feature_name_ asks the native Booster for its names on every
+        # access, so it is read once per forecast rather than once per day.
+        feature_names = model.feature_name_
         
         for i in range(days_ahead + 1): # Predict today + future days
             target_date = today_date + timedelta(days=i)
-            weather_df['Date'] = pd.to_datetime(weather_df['Date'])
-            weather_for_day = weather_df[weather_df['Date'] == target_date]
-            if weather_for_day.empty: raise PredictionError(f"Missing weather for {target_date.date()}")
+            weather_pos = weather_offset + i
+            if not (0 <= weather_pos < len(weather_dates) and weather_dates[weather_pos] == target_date.to_datetime64()):
+                raise PredictionError(f"Missing weather for {target_date.date()}")
             
-            last_known_day = current_history.iloc[-1]
-            seven_days_ago = current_history.iloc[-7]
-            
-            features = { 'temperature_2m_mean': weather_for_day['temperature_2m_mean'].iloc[0], 'temperature_2m_min': weather_for_day['temperature_2m_min'].iloc[0], 'temperature_2m_max': weather_for_day['temperature_2m_max'].iloc[0], 'relative_humidity_2m_mean': weather_for_day['relative_humidity_2m_mean'].iloc[0], 'precipitation_sum': weather_for_day['precipitation_sum'].iloc[0], 'wind_speed_10m_mean': weather_for_day['wind_speed_10m_mean'].iloc[0], 'day_of_week': target_date.dayofweek, 'month': target_date.month, 'year': target_date.year, 'AQI_lag_1_day': last_known_day['AQI'], 'AQI_lag_7_day': seven_days_ago['AQI'] }
-            features_df = pd.DataFrame([features], columns=model.feature_name_)
-            prediction = model.predict(features_df)[0]
+            features = dict(zip(WEATHER_FEATURES, weather_values[weather_pos].tolist()))
+            features.update({ 'day_of_week': target_date.dayofweek, 'month': target_date.month, 'year': target_date.year, 'AQI_lag_1_day': aqi_history[-1], 'AQI_lag_7_day': aqi_history[-7] })
+            features_df = pd.DataFrame([features], columns=feature_names)
+            # A single row gains nothing from OpenMP; one thread avoids the pool start-up cost.
+            prediction = model.predict(features_df, num_threads=1)[0]
             
             raw_predictions.append(prediction)
+            aqi_history.append(prediction)
             
-            new_history_row = pd.DataFrame([{'Date': target_date, 'AQI': prediction}])
-            current_history = pd.concat([current_history.iloc[1:], new_history_row], ignore_index=True)
-            
-        raw_forecast_df = pd.DataFrame({
-            'date': pd.date_range(start=today_date, periods=days_ahead + 1),
-            'raw_pred': raw_predictions
-        })
-        log.info(f"Generated raw model forecast:\n{raw_forecast_df}")
+        raw_predictions = np.asarray(raw_predictions, dtype=np.float64)
+        if log.isEnabledFor(logging.INFO):
+            log.info("Generated raw model forecast from %s: %s", today_date.date(), np.round(raw_predictions, 1).tolist())
         
         # --- Step 3: Apply the "Exponential Residual Decay" Calibration Model ---
-        prediction_for_today = raw_forecast_df['raw_pred'].iloc[0]
+        live_aqi_value = live_aqi_future.result()
+        log.info("Successfully fetched live AQI anchor: %s", live_aqi_value)
+        prediction_for_today = raw_predictions[0]
         live_residual = live_aqi_value - prediction_for_today
         abs_residual = abs(live_residual)
         
@@ -144,56 +320,71 @@ def get_daily_summary_forecast(city_name: str, days_ahead: int = 3):
             slope = (decay_high - decay_low) / (high_residual_threshold - low_residual_threshold)
             gamma = decay_low + slope * (abs_residual - low_residual_threshold)
             
-        log.info(f"Live residual is {live_residual:.1f}. Dynamic error decay factor (gamma) is {gamma:.2f}.")
+        log.info("Live residual is %.1f. Dynamic error decay factor (gamma) is %.2f.", live_residual, gamma)
         
         # Calculate calibrated forecast for future days (excluding today's anchor)
-        # Formula: F_t_calibrated = F_t + R_0 * (gamma ** t)
-        final_forecast_for_ui_raw = []
-        for t in range(1, days_ahead + 1):
-            raw_pred_t = raw_forecast_df['raw_pred'].iloc[t]
-            calibrated_value = raw_pred_t + live_residual * (gamma ** t)
-            final_forecast_for_ui_raw.append(calibrated_value)
-            
-        final_forecast_for_ui = final_forecast_for_ui_raw
+        # Formula: F_t_calibrated = F_t + R_0 * (gamma ** t), for all t at once.
+        steps = np.arange(1, days_ahead + 1, dtype=np.float64)
+        final_forecast_for_ui = raw_predictions[1:] + live_residual * np.power(gamma, steps)
 
         # 4. Format for the UI
-        ui_list = []
         future_dates = pd.date_range(start=today_date + timedelta(days=1), periods=days_ahead)
-        for i, calibrated_aqi in enumerate(final_forecast_for_ui):
-            calibrated_aqi = max(1, calibrated_aqi) # Ensure not negative
-            aqi_info = get_aqi_info(calibrated_aqi)
-            ui_list.append({
-                "date": future_dates[i].strftime('%Y-%m-%d'),
-                "predicted_aqi": round(calibrated_aqi),
-                "level": aqi_info.get("level", "N/A"),
-                "color": aqi_info.get("color", "#FFFFFF"),
-                "implications": aqi_info.get("implications", "N/A")
-            })
+        ui_list = format_forecast_for_ui(future_dates, final_forecast_for_ui)
         # 6. Log the predictions for performance tracking
         try:
             log_file_path = os.path.join(PROJECT_ROOT, "predictions_log.csv")
             log_df = pd.DataFrame(ui_list)
             log_df['city'] = city_name # Add the city name for grouping
 
-            if not os.path.exists(log_file_path):
-                # If the log file doesn't exist, create it with a header.
-                log_df.to_csv(log_file_path, index=False, header=True)
-                log.info(f"Created new prediction log at: {log_file_path}")
-            else:
-                # If it exists, append the new predictions without the header.
-                log_df.to_csv(log_file_path, mode='a', index=False, header=False)
-                log.info(f"Appended {len(log_df)} predictions to log for {city_name}.")
+            # Serialized so concurrent forecasts (see get_daily_summary_forecasts) neither
+            # interleave rows nor both write a header.
+            with _predictions_log_lock:
+                if not os.path.exists(log_file_path):
+                    # If the log file doesn't exist, create it with a header.
+                    log_df.to_csv(log_file_path, index=False, header=True)
+                    log.info("Created new prediction log at: %s", log_file_path)
+                else:
+                    # If it exists, append the new predictions without the header.
+                    log_df.to_csv(log_file_path, mode='a', index=False, header=False)
+                    log.info("Appended %d predictions to log for %s.", len(log_df), city_name)
                 
         except Exception as log_e:
             # A logging failure should not crash the main forecast.
-            log.error(f"Failed to write predictions to log file: {log_e}", exc_info=True)
+            log.error("Failed to write predictions to log file: %s", log_e, exc_info=True)
+
+        with _forecast_cache_lock:
+            _forecast_cache[forecast_key] = [dict(day) for day in ui_list]
+            _forecast_cache.move_to_end(forecast_key)
+            while len(_forecast_cache) > FORECAST_CACHE_SIZE:
+                _forecast_cache.popitem(last=False)  # Least recently used first.
 
         return ui_list
     
     except Exception as e:
-        log.error(f"An unexpected error in get_daily_summary_forecast for {city_name}: {e}", exc_info=True)
+        if live_aqi_future is not None:
+            live_aqi_future.cancel()
+        log.error("An unexpected error in get_daily_summary_forecast for %s: %s", city_name, e, exc_info=True)
         return []
 
+
+def get_daily_summary_forecasts(city_names, days_ahead: int = 3, max_workers: int = 4):
+    """
+    Generates daily forecasts for several cities concurrently.
+
+    Each forecast spends most of its time waiting on the AQICN and Open-Meteo
+    requests, so a thread pool overlaps those waits across cities.
+
+    Returns:
+        dict[str, list]: The `get_daily_summary_forecast` result for each city, in
+                         input order (an empty list for cities that failed).
+    """
+    city_names = list(city_names)
+    if not city_names:
+        return {}
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(city_names))) as executor:
+        forecasts = executor.map(lambda city: get_daily_summary_forecast(city, days_ahead), city_names)
+        return dict(zip(city_names, forecasts))
+
 # --- Main Execution ---
 if __name__ == "__main__":
     test_city = "Mumbai"
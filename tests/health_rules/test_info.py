@@ -24,7 +24,7 @@ if PROJECT_ROOT not in sys.path:
      sys.path.insert(0, PROJECT_ROOT)
 
 # --- Import the function and data to be tested ---
-from src.health_rules.info import get_aqi_info, AQI_SCALE 
+from src.health_rules.info import get_aqi_info, get_aqi_info_batch, AQI_SCALE 
 
 
 # --- Test Cases for get_aqi_info ---
@@ -110,4 +110,28 @@ def test_aqi_scale_consistency():
         except ValueError:
             pytest.fail(f"Could not parse range string: {range_str}")
         except AssertionError as e:
-             pytest.fail(f"Range consistency error for '{range_str}': {e}")
\ No newline at end of file
+             pytest.fail(f"Range consistency error for '{range_str}': {e}")
+
+
+def test_get_aqi_info_matches_scale_ranges():
+    """
+    Tests that every whole AQI value from 0 to beyond the scale maps to the
+    AQI_SCALE category whose range string contains it (Severe above the top).
+    """
+    for aqi in range(0, 601):
+        expected = AQI_SCALE[-1]
+        for category in AQI_SCALE:
+            low, high = map(int, category["range"].split('-'))
+            if low <= aqi <= high:
+                expected = category
+                break
+        assert get_aqi_info(aqi) is expected
+
+
+def test_get_aqi_info_batch_matches_scalar():
+    """
+    Tests that batch classification agrees with get_aqi_info, including rounding
+    at band edges, values above the scale, and invalid (negative/NaN) values.
+    """
+    values = [0, 0.4, 49.5, 50.49, 50.5, 100, 100.6, 200.2, 399.5, 500, 500.5, 750, -1, float('nan')]
+    assert get_aqi_info_batch(values) == [get_aqi_info(value) for value in values]
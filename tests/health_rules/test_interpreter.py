@@ -3,6 +3,9 @@
 """
 Unit tests for the pollutant risk interpretation logic in `src/health_rules/interpreter.py`.
 """
+import asyncio
+import numpy as np
+import pandas as pd
 import pytest
 import sys
 import os
@@ -16,7 +19,13 @@ except NameError:
 if PROJECT_ROOT not in sys.path:
      sys.path.insert(0, PROJECT_ROOT)
 
-from src.health_rules.interpreter import interpret_pollutant_risks
+from src.health_rules.interpreter import (
+    interpret_pollutant_risks,
+    interpret_pollutant_risks_batch,
+    interpret_pollutant_risks_batch_async,
+    interpret_pollutant_risks_df,
+    interpret_max_severity,
+)
 
 # --- Basic Functionality Tests ---
 
@@ -47,6 +56,22 @@ def test_interpret_risks_highest_severity_is_chosen():
     assert len(risks) == 1
     assert "PM25 (Very Poor):" in risks[0]
 
+@pytest.mark.parametrize("iaqi_data, expected_prefixes", [
+    ({'pm25': {'v': 20}, 'o3': {'v': 30}}, []),
+    ({'pm25': {'v': 75.5}, 'co': {'v': 1.0}}, ["PM25 (Moderate):"]),
+    ({'pm10': {'v': 255}, 'o3': {'v': 110}}, ["PM10 (Poor):", "O3 (Moderate):"]),
+    ({'pm25': {'v': 130}, 'no2': {'v': 300}}, ["PM25 (Very Poor):", "NO2 (Very Poor):"]),
+    ({'so2': {'v': 1700}}, ["SO2 (Severe):"]),
+    ({'pm25': {'w': 100}}, []),
+    ({'co': {'v': 'high'}}, []),
+])
+def test_interpret_risks_reference_cases(iaqi_data, expected_prefixes):
+    """Checks a set of reference payloads, in pollutant-table order, against the expected advisories."""
+    risks = interpret_pollutant_risks(iaqi_data)
+    assert len(risks) == len(expected_prefixes)
+    for risk, prefix in zip(risks, expected_prefixes):
+        assert risk.startswith(prefix)
+
 # --- Edge Case and Invalid Input Tests ---
 
 def test_interpret_risks_boundary_values():
@@ -65,6 +90,7 @@ def test_interpret_risks_with_unknown_pollutant():
     ({'pm25': {'v': "high"}}, "Value is a string"),
     ({'pm25': {'value': 100}}, "Missing the 'v' key"),
     ({'pm25': 100}, "Value is not a dictionary"),
+    ({'pm25': {'v': None}}, "Value is None"),
 ])
 def test_interpret_risks_malformed_input_data(malformed_data, description):
     """
@@ -77,4 +103,94 @@ def test_interpret_risks_malformed_input_data(malformed_data, description):
 def test_interpret_risks_empty_or_none_input():
     """Tests that an empty dictionary or a None input returns an empty list."""
     assert interpret_pollutant_risks({}) == []
-    assert interpret_pollutant_risks(None) == []
\ No newline at end of file
+    assert interpret_pollutant_risks(None) == []
+
+def test_interpret_risks_nan_value_is_ignored():
+    """Tests that a NaN pollutant value does not get classified into any risk band."""
+    assert interpret_pollutant_risks({'pm25': {'v': float('nan')}}) == []
+    assert interpret_pollutant_risks({'co': {'v': 'nan'}}) == []
+
+def test_interpret_risks_text_subclass_and_bytes_values():
+    """Tests that np.str_ and bytes readings are parsed like plain numeric strings."""
+    expected = interpret_pollutant_risks({'pm25': {'v': 61.5}, 'pm10': {'v': 260}})
+    iaqi_data = {'pm25': {'v': np.str_("61.5")}, 'pm10': {'v': b"260"}}
+    assert interpret_pollutant_risks(iaqi_data) == expected
+    assert interpret_pollutant_risks_batch([iaqi_data]) == [expected]
+    assert interpret_pollutant_risks({'so2': {'v': bytearray(b"1700")}}) == interpret_pollutant_risks({'so2': {'v': 1700}})
+
+# --- Batch Interpretation Tests ---
+
+def test_interpret_risks_batch_matches_scalar():
+    """Tests that the batch interpreter returns the same advisories as the scalar one, row by row."""
+    iaqi_list = [
+        {'pm25': {'v': 10.5}, 'pm10': {'v': 45}},
+        {'pm10': {'v': 260}, 'o3': {'v': 115}},
+        {'pm25': {'v': 61}, 'co': {'v': 40}, 'h': {'v': 80}},
+        {'pm25': {'v': "high"}, 'so2': {'v': "1700"}},
+        {'pm25': 100},
+        {},
+        None,
+    ]
+    assert interpret_pollutant_risks_batch(iaqi_list) == [interpret_pollutant_risks(d) for d in iaqi_list]
+
+def test_interpret_risks_batch_infinite_value():
+    """Tests that an infinite reading maps to the top band and never to a padding slot."""
+    result = interpret_pollutant_risks_batch([{'pm25': {'v': float('inf')}}])
+    assert result == [interpret_pollutant_risks({'pm25': {'v': float('inf')}})]
+    assert None not in result[0]
+
+def test_interpret_risks_batch_empty_input():
+    """Tests that an empty or None batch returns an empty list."""
+    assert interpret_pollutant_risks_batch([]) == []
+    assert interpret_pollutant_risks_batch(None) == []
+
+def test_interpret_risks_only_weather_keys():
+    """Tests that a payload carrying only non-pollutant keys (humidity, wind, ...) yields no risks."""
+    assert interpret_pollutant_risks({'h': {'v': 80}, 't': {'v': 31}, 'w': {'v': 4.2}}) == []
+
+def test_interpret_risks_repeated_calls_return_independent_lists():
+    """Tests that mutating a returned list does not affect later calls with the same (cached) input."""
+    iaqi_data = {'pm25': {'v': 130}}
+    first = interpret_pollutant_risks(iaqi_data)
+    first.append("caller-side edit")
+    second = interpret_pollutant_risks(iaqi_data)
+    assert len(second) == 1
+    assert "PM25 (Very Poor):" in second[0]
+
+def test_interpret_risks_batch_async_matches_sync():
+    """Tests that the async batch wrapper returns the same result as the synchronous batch call."""
+    iaqi_list = [{'pm25': {'v': 130}}, {'so2': {'v': 1700}}, None]
+    assert asyncio.run(interpret_pollutant_risks_batch_async(iaqi_list)) == interpret_pollutant_risks_batch(iaqi_list)
+
+def test_interpret_risks_df_matches_scalar():
+    """Tests that the DataFrame interpreter agrees with the scalar interpreter for every row."""
+    df = pd.DataFrame({
+        'pm25': [10.5, 130, np.nan, 61],
+        'o3': [30, 115, 800, np.nan],
+        'h': [80, 75, 60, 55],
+    }, index=['a', 'b', 'c', 'd'])
+    result = interpret_pollutant_risks_df(df)
+    assert list(result.index) == ['a', 'b', 'c', 'd']
+    for label, row in df.iterrows():
+        iaqi_data = {col: {'v': value} for col, value in row.items() if not pd.isna(value)}
+        assert result[label] == interpret_pollutant_risks(iaqi_data)
+
+@pytest.mark.parametrize("iaqi_data, expected", [
+    (None, 0),
+    ({'h': {'v': 80}}, 0),
+    ({'pm25': {'v': 40}, 'co': {'v': 1.5}}, 0),
+    ({'pm25': {'v': 61}}, 1),
+    ({'pm25': {'v': 95}, 'co': {'v': 20}}, 3),
+    ({'o3': {'v': 800}, 'pm10': {'v': 'bad'}}, 4),
+])
+def test_interpret_max_severity(iaqi_data, expected):
+    """Tests that the severity ordinal reflects the worst band reached by any pollutant."""
+    assert interpret_max_severity(iaqi_data) == expected
+
+def test_interpret_risks_df_ignores_unparseable_cells():
+    """Tests that non-numeric cells are skipped while numeric strings are still read."""
+    df = pd.DataFrame({'pm25': ['130', 'n/a', None], 'co': [1.0, 20, 'bad']})
+    result = interpret_pollutant_risks_df(df)
+    assert result[0] == interpret_pollutant_risks({'pm25': {'v': 130}, 'co': {'v': 1.0}})
+    assert result[1] == interpret_pollutant_risks({'co': {'v': 20}})
+    assert result[2] == []
@@ -7,6 +7,8 @@ import pytest
 import pandas as pd
 import os
 import sys
+import threading
+import time
 import requests
 from unittest.mock import MagicMock
 
@@ -19,17 +21,37 @@ except NameError:
 if PROJECT_ROOT not in sys.path:
      sys.path.insert(0, PROJECT_ROOT)
 
-from src.modeling.predictor import get_daily_summary_forecast
+import src.modeling.predictor as predictor
+from src.modeling.predictor import (
+    get_daily_summary_forecast, format_forecast_for_ui, load_lgbm_model, warm_model_cache,
+    clear_model_cache, get_daily_summary_forecasts,
+    _get_live_aqi_value, _get_weather_forecast, _load_recent_history, _forecast_cache,
+)
 from src.exceptions import ModelFileNotFoundError, PredictionError
 
 # --- Mock Data and Fixtures ---
 
+@pytest.fixture(autouse=True)
+def clear_predictor_caches():
+    """Keeps the predictor's memos and forecast cache from leaking mocked values between tests."""
+    for cached in (_get_live_aqi_value, _get_weather_forecast, _load_recent_history):
+        cached.cache_clear()
+    _forecast_cache.clear()
+    yield
+    for cached in (_get_live_aqi_value, _get_weather_forecast, _load_recent_history):
+        cached.cache_clear()
+    _forecast_cache.clear()
+
+
 @pytest.fixture
-def mock_dependencies(mocker):
+def mock_dependencies(mocker, tmp_path):
     """
     This fixture uses pytest-mock to "hijack" all the external dependencies
-    that our predictor function relies on.
+    that our predictor function relies on. Returns the mock model.
     """
+    # 0. Keep predictions_log.csv writes out of the real project directory
+    mocker.patch('src.modeling.predictor.PROJECT_ROOT', str(tmp_path))
+
     # 1. Mock the LightGBM model object
     mock_model = MagicMock()
     mock_model.predict.return_value = [150.0]
@@ -70,6 +92,8 @@ def mock_dependencies(mocker):
     mock_response.raise_for_status.return_value = None
     mocker.patch('src.modeling.predictor.requests.get', return_value=mock_response)
 
+    return mock_model
+
 
 # --- Test Cases ---
 
@@ -91,6 +115,27 @@ def test_get_daily_summary_forecast_success(mock_dependencies):
     assert forecast[1]['predicted_aqi'] == 148
     assert forecast[2]['predicted_aqi'] == 149
 
+def test_get_daily_summary_forecast_missing_weather_day(mock_dependencies, mocker):
+    """
+    Tests that the function returns an empty list if the weather forecast does not cover today.
+    """
+    tomorrow_onwards = pd.date_range(start=pd.Timestamp.now().normalize() + pd.Timedelta(days=1), periods=4)
+    weather_data = {
+        'time': [d.strftime('%Y-%m-%d') for d in tomorrow_onwards],
+        'temperature_2m_mean': [25.0] * 4,
+        'temperature_2m_min': [20.0] * 4,
+        'temperature_2m_max': [30.0] * 4,
+        'relative_humidity_2m_mean': [70.0] * 4,
+        'precipitation_sum': [0.0] * 4,
+        'wind_speed_10m_mean': [10.0] * 4
+    }
+    mock_response = MagicMock(spec=requests.Response)
+    mock_response.json.return_value = {'daily': weather_data}
+    mocker.patch('src.modeling.predictor.requests.get', return_value=mock_response)
+
+    forecast = get_daily_summary_forecast("TestCity", days_ahead=3)
+    assert forecast == []
+
 def test_get_daily_summary_forecast_model_not_found(mocker):
     """
     Tests that the function returns an empty list if the model file is not found.
@@ -100,14 +145,205 @@ def test_get_daily_summary_forecast_model_not_found(mocker):
     forecast = get_daily_summary_forecast("UnknownCity")
     assert forecast == []
 
-def test_get_daily_summary_forecast_live_aqi_fails(mocker):
+def test_get_daily_summary_forecast_live_aqi_fails(mock_dependencies, mocker):
     """
     Tests that the function returns an empty list if the live AQI call fails.
     """
-
+    # The live AQI is fetched in the background, so let everything else succeed to
+    # make sure its failure alone is what empties the forecast.
     mocker.patch('src.modeling.predictor.get_current_aqi_for_city', return_value={'error': 'API down'})
-    mocker.patch('src.modeling.predictor.load_lgbm_model')
-    mocker.patch('src.modeling.predictor.pd.read_csv')
 
     forecast = get_daily_summary_forecast("AnyCity")
-    assert forecast == []
\ No newline at end of file
+    assert forecast == []
+
+
+def test_format_forecast_for_ui_rounds_and_floors():
+    """
+    Tests that UI formatting rounds to whole AQI values, floors at 1 and formats dates.
+    """
+    dates = pd.date_range(start='2024-01-01', periods=3)
+    ui_list = format_forecast_for_ui(dates, [-5.0, 50.4, 250.6])
+
+    assert [day['date'] for day in ui_list] == ['2024-01-01', '2024-01-02', '2024-01-03']
+    assert [day['predicted_aqi'] for day in ui_list] == [1, 50, 251]
+    assert [day['level'] for day in ui_list] == ['Good', 'Good', 'Poor']
+
+
+def test_get_daily_summary_forecast_nan_model_output(mock_dependencies):
+    """
+    Tests that a NaN model prediction is floored to an AQI of 1 instead of failing the forecast.
+    """
+    mock_dependencies.predict.return_value = [float('nan')]
+
+    forecast = get_daily_summary_forecast("TestCity", days_ahead=3)
+    assert [day['predicted_aqi'] for day in forecast] == [1, 1, 1]
+    assert all(day['level'] == 'Good' for day in forecast)
+
+def test_load_lgbm_model_is_cached_per_city(mocker):
+    """
+    Tests that a city's model file is only deserialized once across repeated loads.
+    """
+    clear_model_cache()
+    mock_load = mocker.patch('joblib.load', side_effect=lambda path: MagicMock())
+
+    first = load_lgbm_model("TestCity")
+    assert load_lgbm_model("TestCity") is first
+    assert load_lgbm_model("OtherCity") is not first
+    assert mock_load.call_count == 2
+    clear_model_cache()
+
+
+def test_live_aqi_is_reused_within_ttl_window(mock_dependencies, mocker):
+    """
+    Tests that repeated forecasts in the same TTL window fetch the live AQI only once.
+    """
+    mock_live = mocker.patch('src.modeling.predictor.get_current_aqi_for_city', return_value={'aqi': 135})
+    mocker.patch('src.modeling.predictor.time.time', return_value=1_000_000.0)
+
+    first = get_daily_summary_forecast("TestCity", days_ahead=3)
+    second = get_daily_summary_forecast("TestCity", days_ahead=3)
+
+    assert first == second
+    assert mock_live.call_count == 1
+
+
+def test_zero_ttl_does_not_break_forecast(mock_dependencies, mocker):
+    """
+    Tests that a TTL configured as 0 falls back to a 1-second window instead of raising.
+    """
+    mocker.patch('src.modeling.predictor.LIVE_AQI_TTL_SECONDS', 0)
+    mocker.patch('src.modeling.predictor.WEATHER_FORECAST_TTL_SECONDS', 0)
+
+    result = get_daily_summary_forecast("TestCity", days_ahead=3)
+    assert [day['predicted_aqi'] for day in result] == [144, 148, 149]
+
+def test_warm_model_cache_skips_missing_models(mocker):
+    """
+    Tests that preloading loads every available model and skips cities without one.
+    """
+    def fake_load(city_name):
+        if city_name == "NoModelCity":
+            raise ModelFileNotFoundError(city_name)
+        return MagicMock()
+    mock_load = mocker.patch('src.modeling.predictor.load_lgbm_model', side_effect=fake_load)
+
+    assert warm_model_cache(["CityA", "CityB", "NoModelCity"]) == 2
+    assert mock_load.call_count == 3
+
+
+def test_concurrent_first_loads_read_model_once(mocker):
+    """
+    Tests that simultaneous first requests for the same city deserialize its model once.
+    """
+    clear_model_cache()
+
+    def slow_load(path):
+        time.sleep(0.05)
+        return MagicMock()
+    mock_load = mocker.patch('joblib.load', side_effect=slow_load)
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(load_lgbm_model("TestCity"))) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert mock_load.call_count == 1
+    assert all(result is results[0] for result in results)
+    clear_model_cache()
+
+
+def test_history_file_is_parsed_once_per_version(mock_dependencies, mocker):
+    """
+    Tests that repeated forecasts reuse the parsed history until the file changes.
+    """
+    mock_read = predictor.pd.read_csv
+    mocker.patch('src.modeling.predictor.os.path.getmtime', return_value=1.0)
+
+    get_daily_summary_forecast("TestCity", days_ahead=3)
+    get_daily_summary_forecast("TestCity", days_ahead=3)
+    assert mock_read.call_count == 1
+
+    mocker.patch('src.modeling.predictor.os.path.getmtime', return_value=2.0)
+    get_daily_summary_forecast("TestCity", days_ahead=3)
+    assert mock_read.call_count == 2
+
+
+def test_load_lgbm_model_missing_file(tmp_path, mocker):
+    """
+    Tests that a missing model file surfaces as ModelFileNotFoundError and is not cached.
+    """
+    clear_model_cache()
+    mocker.patch('src.modeling.predictor.MODELS_DIR', str(tmp_path))
+
+    with pytest.raises(ModelFileNotFoundError):
+        load_lgbm_model("NoSuchCity")
+    with pytest.raises(ModelFileNotFoundError):
+        load_lgbm_model("NoSuchCity")
+    clear_model_cache()
+
+
+def test_get_daily_summary_forecasts_for_several_cities(mock_dependencies):
+    """
+    Tests that the multi-city forecast returns each city's forecast keyed by name.
+    """
+    forecasts = get_daily_summary_forecasts(["TestCity", "NoHistoryCity"], days_ahead=3)
+
+    assert list(forecasts) == ["TestCity", "NoHistoryCity"]
+    assert [day['predicted_aqi'] for day in forecasts["TestCity"]] == [144, 148, 149]
+    assert forecasts["NoHistoryCity"] == []
+
+
+def test_weather_forecast_is_reused_within_ttl_window(mock_dependencies, mocker):
+    """
+    Tests that repeated forecasts for a location in the same TTL window call Open-Meteo once.
+    """
+    mocker.patch('src.modeling.predictor.time.time', return_value=1_000_000.0)
+
+    get_daily_summary_forecast("TestCity", days_ahead=3)
+    get_daily_summary_forecast("TestCity", days_ahead=3)
+    assert predictor.requests.get.call_count == 1
+
+
+def test_repeat_forecast_is_served_from_cache(mock_dependencies, mocker):
+    """
+    Tests that an identical forecast request in the same window skips the model, and
+    that callers get independent copies of the cached result.
+    """
+    mocker.patch('src.modeling.predictor.time.time', return_value=1_000_000.0)
+
+    first = get_daily_summary_forecast("TestCity", days_ahead=3)
+    first[0]['predicted_aqi'] = -1
+    second = get_daily_summary_forecast("TestCity", days_ahead=3)
+
+    assert [day['predicted_aqi'] for day in second] == [144, 148, 149]
+    assert predictor.load_lgbm_model.return_value.predict.call_count == 4
+
+
+def test_forecast_cache_evicts_least_recently_used(mock_dependencies, mocker):
+    """
+    Tests that a cache hit refreshes an entry, so the least recently used forecast is evicted.
+    """
+    mocker.patch('src.modeling.predictor.time.time', return_value=1_000_000.0)
+    mocker.patch('src.modeling.predictor.FORECAST_CACHE_SIZE', 2)
+
+    get_daily_summary_forecast("TestCity", days_ahead=1)
+    get_daily_summary_forecast("TestCity", days_ahead=2)
+    get_daily_summary_forecast("TestCity", days_ahead=1)
+    get_daily_summary_forecast("TestCity", days_ahead=3)
+
+    assert [key[1] for key in predictor._forecast_cache] == [1, 3]
+
+
+def test_clear_model_cache_drops_cached_forecasts(mock_dependencies, mocker):
+    """
+    Tests that clearing the model cache after retraining also drops forecasts made with the old models.
+    """
+    mocker.patch('src.modeling.predictor.time.time', return_value=1_000_000.0)
+
+    get_daily_summary_forecast("TestCity", days_ahead=3)
+    clear_model_cache()
+    get_daily_summary_forecast("TestCity", days_ahead=3)
+
+    assert mock_dependencies.predict.call_count == 8